@@ -259,8 +259,10 @@ def serve(ctx: click.Context, **arguments: Any) -> None:
             click.echo('Cannot restart on SIGHUP, signal handler could not be added.')
 
         # Wait until Ctrl+C has been pressed
-        click.echo('Started')
+        # Note: 'Started' is echoed within the `try` block, so an interrupt right
+        #       after the announcement still results in a clean shutdown.
         try:
+            click.echo('Started')
             loop.run_until_complete(restart_signal)
         except KeyboardInterrupt:
             click.echo()
@@ -53,11 +53,13 @@ tests_require = [
     'pytest-asyncio>=0.9.0',
     'pytest-cov>=2.5.1',
     'pytest-mock>=1.10.0',
+    'pytest-xdist>=1.22.0',
     'flake8>=3.7.8',
     'isort>=4.3.21',
     'collective.checkdocs>=0.2',
     'Pygments>=2.2.0',  # required by checkdocs
     'ordered-set>=3.0.1',  # required by TestServer class
+    'msgpack>=0.6.1',  # required by the (un)pack message fixtures
 ] + logging_require + mypy_require
 
 setup(
@@ -1,19 +1,25 @@
 import asyncio
 import functools
 import os
+import random
+import signal
 import socket
 import ssl
 import struct
 import subprocess
 import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
+from unittest import mock
 
 import libnacl.public
 import logbook
+import msgpack
 import ordered_set
 import pytest
-import umsgpack
 import websockets
+from click.testing import CliRunner
 
 from saltyrtc.server import (
     NONCE_FORMATTER,
@@ -24,6 +30,24 @@ from saltyrtc.server import (
     serve,
     util,
 )
+from saltyrtc.server.bin import cli as cli_group
+
+# Reusable MessagePack encoder/decoder (keep their internal buffers across
+# messages). Use msgspec if available since it's faster than msgpack.
+try:
+    import msgspec
+except ImportError:
+    msgpack_library = 'msgpack'
+    _packb = msgpack.Packer(use_bin_type=True).pack
+    _unpackb = functools.partial(msgpack.unpackb, raw=False)
+else:
+    msgpack_library = 'msgspec'
+    _packb = msgspec.msgpack.Encoder().encode
+    _unpackb = msgspec.msgpack.Decoder().decode
+
+# Precompiled nonce and combined sequence number structures
+_nonce_struct = struct.Struct(NONCE_FORMATTER)
+_csn_struct = struct.Struct('!Q')
 
 
 class CalledProcessError(subprocess.CalledProcessError):
@@ -38,7 +62,8 @@ def pytest_addoption(parser):
     parser.addoption('--repeat', action='store', help=help_)
 
     # 'loop' parameter
-    help_ = 'Use a different event loop, supported: asyncio, uvloop'
+    help_ = ('Use a different event loop, supported: asyncio, uvloop '
+             '(defaults to uvloop if SALTYRTC_USE_UVLOOP is set)')
     parser.addoption('--loop', action='store', help=help_)
 
     # 'timeout' parameter
@@ -57,6 +82,7 @@ def pytest_report_header(config):
     lines = [
         'Using event loop: {}'.format(default_event_loop(config=config)),
         'Using timeout: {}s'.format(_get_timeout(config=config)),
+        'Using MessagePack library: {}'.format(msgpack_library),
     ]
     return '\n'.join(lines)
 
@@ -91,6 +117,8 @@ def pytest_namespace():
             SubProtocol.saltyrtc_v1.value
         ],
         'timeout': 0.4,
+        # Additional time granted to CLI subprocesses for starting the interpreter
+        'cli_startup_timeout': 10.0,
         'run_long_tests': False,
     }
     saltyrtc['long_test'] = pytest.mark.skipif(
@@ -103,6 +131,8 @@ def default_event_loop(request=None, config=None):
     if request is not None:
         config = request.config
     loop = config.getoption("--loop")
+    if loop is None and os.environ.get('SALTYRTC_USE_UVLOOP'):
+        loop = 'uvloop'
     if loop == 'uvloop':
         import uvloop
         asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -111,18 +141,28 @@ def default_event_loop(request=None, config=None):
     return loop
 
 
+# Ports that have already been handed out during this session
+_allocated_ports = set()
+
+
 def unused_tcp_port():
     """
     Find an unused localhost TCP port from 1024-65535 and return it.
+    A port will not be returned more than once per session.
     """
-    with closing(socket.socket()) as sock:
-        sock.bind((pytest.saltyrtc.host, 0))
-        return sock.getsockname()[1]
+    while True:
+        with closing(socket.socket()) as sock:
+            sock.bind((pytest.saltyrtc.host, 0))
+            port = sock.getsockname()[1]
+        if port not in _allocated_ports:
+            _allocated_ports.add(port)
+            return port
 
 
+@functools.lru_cache(maxsize=None)
 def url(host, port):
     """
-    Return the URL where the server can be reached.
+    Return the (cached) URL where the server can be reached.
     """
     return 'wss://{}:{}'.format(host, port)
 
@@ -134,10 +174,11 @@ def key_pair():
     return libnacl.public.SecretKey()
 
 
+@functools.lru_cache(maxsize=None)
 def key_path(key_pair):
     """
-    Return the hexadecimal key path from a key pair using the public
-    key.
+    Return the (cached) hexadecimal key path from a key pair using the
+    public key.
 
     Arguments:
         - `key_pair`: A :class:`libnacl.public.SecretKey` instance.
@@ -145,11 +186,55 @@ def key_path(key_pair):
     return key_pair.hex_pk().decode()
 
 
+@functools.lru_cache(maxsize=None)
+def path_url(address, key_pair):
+    """
+    Return the (cached) URL of a path on the server.
+
+    Arguments:
+        - `address`: A tuple containing the server's host and port.
+        - `key_pair`: A :class:`libnacl.public.SecretKey` instance.
+    """
+    return '{}/{}'.format(url(*address), key_path(key_pair))
+
+
+# Cookies do not need to be cryptographically secure for most tests
+_cookie_random = random.Random(os.urandom(32))
+
+
 def random_cookie():
     """
     Return a random cookie for the client.
+
+    Note: Set the environment variable `SALTYRTC_TEST_SECURE_COOKIES`
+          to ``1`` to use the OS' CSPRNG for cookies.
+    """
+    if os.environ.get('SALTYRTC_TEST_SECURE_COOKIES') == '1':
+        return os.urandom(16)
+    return _cookie_random.getrandbits(128).to_bytes(16, 'big')
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client_ssl_context():
     """
-    return os.urandom(16)
+    Return the (cached) SSL context used by test clients.
+
+    Note: DH parameters are only used by the server side of a
+          connection, so they are not being loaded here.
+    """
+    return ssl.create_default_context(
+        ssl.Purpose.SERVER_AUTH, cafile=pytest.saltyrtc.cert)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_server_ssl_context():
+    """
+    Return the (cached) SSL context used by test servers. The DH
+    parameters are therefore only parsed once per session.
+    """
+    return util.create_ssl_context(
+        pytest.saltyrtc.cert, keyfile=pytest.saltyrtc.key,
+        dh_params_file=pytest.saltyrtc.dh_params)
 
 
 def _get_timeout(timeout=None, request=None, config=None):
@@ -167,7 +252,36 @@ def _get_timeout(timeout=None, request=None, config=None):
         return timeout
 
 
-@pytest.fixture(scope='module')
+async def _wait_for(coroutine, timeout, loop):
+    """
+    Wait for a coroutine to complete with a timeout.
+
+    Unlike :func:`asyncio.wait_for`, the task is being awaited directly
+    and cancelled by a timer once the deadline has been reached, which
+    avoids an additional waiter future per call.
+
+    Raises :exc:`asyncio.TimeoutError` in case the timeout expired.
+    """
+    task = loop.create_task(coroutine)
+    timed_out = False
+
+    def _on_timeout():
+        nonlocal timed_out
+        timed_out = True
+        task.cancel()
+
+    handle = loop.call_at(loop.time() + timeout, _on_timeout)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if timed_out:
+            raise asyncio.TimeoutError() from None
+        raise
+    finally:
+        handle.cancel()
+
+
+@pytest.fixture(scope='session')
 def event_loop(request):
     """
     Create an instance of the requested event loop.
@@ -190,7 +304,7 @@ def event_loop(request):
     return _event_loop
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def server_permanent_keys():
     """
     Return the server's permanent test NaCl key pairs.
@@ -201,7 +315,27 @@ def server_permanent_keys():
     ]
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
+def primary_key_hex():
+    """
+    Return the content of the server's primary permanent test key file
+    (hex-encoded private key).
+    """
+    with open(pytest.saltyrtc.permanent_key_primary, 'r') as file:
+        return file.read()
+
+
+@pytest.fixture
+def cli_port():
+    """
+    Return an unused port (as a string) for a server started via the
+    CLI. Since each test gets its own port, tests can run in parallel
+    (e.g. by using `pytest-xdist`).
+    """
+    return str(unused_tcp_port())
+
+
+@pytest.fixture(scope='session')
 def server_key():
     """
     Return a server NaCl key pair to be used by the server only.
@@ -209,7 +343,7 @@ def server_key():
     return key_pair()
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def initiator_key():
     """
     Return a client NaCl key pair to be used by the initiator only.
@@ -217,7 +351,7 @@ def initiator_key():
     return key_pair()
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def responder_key():
     """
     Return a client NaCl key pair to be used by the responder only.
@@ -304,25 +438,33 @@ class TestServer(Server):
             connection_closed_future=connection_closed_future)
 
 
-@pytest.fixture(scope='module')
-def server_factory(request, event_loop, server_permanent_keys):
+@pytest.fixture(scope='session', autouse=True)
+def logging_setup(request):
     """
-    Return a factory to create :class:`saltyrtc.Server` instances.
+    Enable logging and push a :class:`logbook.StderrHandler` once for
+    the whole session.
     """
-    # Enable asyncio debug logging
-    event_loop.set_debug(True)
-
-    # Enable logging
     util.enable_logging(level=logbook.DEBUG, redirect_loggers={
         'asyncio': logbook.WARNING,
         'websockets': logbook.WARNING,
     })
-
-    # Push handlers
     logging_handler = logbook.StderrHandler(bubble=True)
     logging_handler.push_application()
 
-    _server_instances = []
+    def fin():
+        logging_handler.pop_application()
+
+    request.addfinalizer(fin)
+    return logging_handler
+
+
+@pytest.fixture(scope='session')
+def server_factory(request, event_loop, server_permanent_keys):
+    """
+    Return a factory to create :class:`saltyrtc.Server` instances.
+    """
+    # Enable asyncio debug logging
+    event_loop.set_debug(True)
 
     def _server_factory(permanent_keys=None):
         if permanent_keys is None:
@@ -331,9 +473,7 @@ def server_factory(request, event_loop, server_permanent_keys):
         # Setup server
         port = unused_tcp_port()
         coroutine = serve(
-            util.create_ssl_context(
-                pytest.saltyrtc.cert, keyfile=pytest.saltyrtc.key,
-                dh_params_file=pytest.saltyrtc.dh_params),
+            _get_server_ssl_context(),
             permanent_keys,
             host=pytest.saltyrtc.host,
             port=port,
@@ -345,21 +485,16 @@ def server_factory(request, event_loop, server_permanent_keys):
         server_.timeout = _get_timeout(request=request)
         server_.address = (pytest.saltyrtc.host, port)
 
-        _server_instances.append(server_)
-
         def fin():
             server_.close()
             event_loop.run_until_complete(server_.wait_closed())
-            _server_instances.remove(server_)
-            if len(_server_instances) == 0:
-                logging_handler.pop_application()
 
         request.addfinalizer(fin)
         return server_
     return _server_factory
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def server(server_factory):
     """
     Return a :class:`saltyrtc.Server` instance.
@@ -367,7 +502,7 @@ def server(server_factory):
     return server_factory()
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def server_no_key(server_factory):
     """
     Return a :class:`saltyrtc.Server` instance that has no permanent
@@ -422,12 +557,14 @@ class _DefaultBox:
 
 class Client:
     def __init__(
-            self, ws_client, pack_message, unpack_message, request,
-            timeout=None,
+            self, ws_client, pack_message, pack_messages, unpack_message,
+            unpack_messages, request, timeout=None,
     ) -> None:
         self.ws_client = ws_client
         self.pack_and_send = pack_message
+        self.pack_and_send_batch = pack_messages
         self.recv_and_unpack = unpack_message
+        self.recv_and_unpack_batch = unpack_messages
         self.timeout = _get_timeout(timeout=timeout, request=request)
         self.session_key = None
         self.box = None
@@ -440,6 +577,14 @@ class Client:
             box=self.box if box == _DefaultBox else box, timeout=timeout, pack=pack
         )
 
+    async def send_batch(self, items, box=_DefaultBox, timeout=None, pack=True):
+        if timeout is None:
+            timeout = self.timeout
+        return await self.pack_and_send_batch(
+            self.ws_client, items,
+            box=self.box if box == _DefaultBox else box, timeout=timeout, pack=pack
+        )
+
     async def recv(self, box=_DefaultBox, timeout=None):
         if timeout is None:
             timeout = self.timeout
@@ -448,6 +593,14 @@ class Client:
             box=self.box if box == _DefaultBox else box, timeout=timeout
         )
 
+    async def recv_batch(self, count, box=_DefaultBox, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        return await self.recv_and_unpack_batch(
+            self.ws_client, count,
+            box=self.box if box == _DefaultBox else box, timeout=timeout
+        )
+
     def close(self):
         return self.ws_client.close()
 
@@ -471,16 +624,14 @@ def ws_client_factory(initiator_key, event_loop, client_kwargs, server):
     # Note: The `server` argument is only required to fire up the server.
     server_ = server
 
-    # Create SSL context
-    ssl_context = ssl.create_default_context(
-        ssl.Purpose.SERVER_AUTH, cafile=pytest.saltyrtc.cert)
-    ssl_context.load_dh_params(pytest.saltyrtc.dh_params)
+    # Get SSL context
+    ssl_context = _get_client_ssl_context()
 
     def _ws_client_factory(server=None, path=None, **kwargs):
         if server is None:
             server = server_
         if path is None:
-            path = '{}/{}'.format(url(*server.address), key_path(initiator_key))
+            path = path_url(server.address, initiator_key)
         _kwargs = client_kwargs.copy()
         _kwargs.update(kwargs)
         return websockets.connect(path, ssl=ssl_context, **_kwargs)
@@ -490,7 +641,8 @@ def ws_client_factory(initiator_key, event_loop, client_kwargs, server):
 @pytest.fixture(scope='module')
 def client_factory(
         request, initiator_key, event_loop, client_kwargs, server, server_permanent_keys,
-        responder_key, pack_nonce, pack_message, unpack_message
+        responder_key, pack_nonce, pack_message, pack_messages, unpack_message,
+        unpack_messages
 ):
     """
     Return a simplified :class:`websockets.client.connect` wrapper
@@ -499,10 +651,8 @@ def client_factory(
     # Note: The `server` argument is only required to fire up the server.
     server_ = server
 
-    # Create SSL context
-    ssl_context = ssl.create_default_context(
-        ssl.Purpose.SERVER_AUTH, cafile=pytest.saltyrtc.cert)
-    ssl_context.load_dh_params(pytest.saltyrtc.dh_params)
+    # Get SSL context
+    ssl_context = _get_client_ssl_context()
 
     async def _client_factory(
             server=None, ws_client=None,
@@ -521,11 +671,9 @@ def client_factory(
         _kwargs.update(kwargs)
         if ws_client is None:
             ws_client = await websockets.connect(
-                '{}/{}'.format(url(*server.address), key_path(path)),
-                ssl=ssl_context, **_kwargs
-            )
+                path_url(server.address, path), ssl=ssl_context, **_kwargs)
         client = Client(
-            ws_client, pack_message, unpack_message,
+            ws_client, pack_message, pack_messages, unpack_message, unpack_messages,
             request, timeout=timeout
         )
         nonces = {}
@@ -593,65 +741,191 @@ def client_factory(
 
 
 @pytest.fixture(scope='module')
-def unpack_message(request, event_loop):
+def msgpack_executor(request):
+    """
+    Return an executor that (de)serialises MessagePack payloads off the
+    event loop.
+
+    Note: A single worker is used since the encoder and decoder
+          instances are shared.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def fin():
+        executor.shutdown()
+
+    request.addfinalizer(fin)
+    return executor
+
+
+async def _unpack_data(loop, executor, data, box=None):
+    """
+    Return the deserialised (and optionally decrypted) message of the
+    data including the nonce alongside the nonce's fields.
+    """
+    # Note: Slicing the view does not copy the data. Only the NaCl box
+    #       requires a copy as it does not accept a buffer.
+    view = memoryview(data)
+    (cookie,
+     source, destination,
+     combined_sequence_number) = _nonce_struct.unpack_from(view)
+    combined_sequence_number, *_ = _csn_struct.unpack(
+        b'\x00\x00' + combined_sequence_number)
+    data = view[NONCE_LENGTH:]
+    if box is not None:
+        nonce = bytes(view[:NONCE_LENGTH])
+        data = box.decrypt(bytes(data), nonce=nonce)
+    else:
+        nonce = None
+    message = await loop.run_in_executor(executor, _unpackb, data)
+    return (
+        message,
+        nonce,
+        cookie,
+        source, destination,
+        combined_sequence_number
+    )
+
+
+@pytest.fixture(scope='module')
+def unpack_message(request, event_loop, msgpack_executor):
     async def _unpack_message(client, box=None, timeout=None):
         timeout = _get_timeout(timeout=timeout, request=request)
-        data = await asyncio.wait_for(client.recv(), timeout, loop=event_loop)
-        nonce = data[:NONCE_LENGTH]
-        (cookie,
-         source, destination,
-         combined_sequence_number) = struct.unpack(NONCE_FORMATTER, nonce)
-        combined_sequence_number, *_ = struct.unpack(
-            '!Q', b'\x00\x00' + combined_sequence_number)
-        data = data[NONCE_LENGTH:]
-        if box is not None:
-            data = box.decrypt(data, nonce=nonce)
-        else:
-            nonce = None
-        message = umsgpack.unpackb(data)
-        return (
-            message,
-            nonce,
-            cookie,
-            source, destination,
-            combined_sequence_number
-        )
+        data = await _wait_for(client.recv(), timeout, event_loop)
+        return await _unpack_data(event_loop, msgpack_executor, data, box=box)
     return _unpack_message
 
 
+@pytest.fixture(scope='module')
+def unpack_messages(request, event_loop, msgpack_executor):
+    """
+    Receive and unpack a known amount of messages within a single
+    timeout.
+
+    Note: The SaltyRTC protocol requires one message per WebSocket
+          frame, so each message is still being received as its own
+          frame.
+    """
+    async def _unpack_messages(client, count, box=None, timeout=None):
+        async def _recv_all():
+            return [
+                await _unpack_data(
+                    event_loop, msgpack_executor, await client.recv(), box=box)
+                for _ in range(count)
+            ]
+
+        timeout = _get_timeout(timeout=timeout, request=request)
+        return await _wait_for(_recv_all(), timeout, event_loop)
+    return _unpack_messages
+
+
 @pytest.fixture(scope='module')
 def pack_nonce():
     def _pack_nonce(cookie, source, destination, combined_sequence_number):
-        return struct.pack(
-            NONCE_FORMATTER,
+        return _nonce_struct.pack(
             cookie,
             source, destination,
-            struct.pack('!Q', combined_sequence_number)[2:]
+            _csn_struct.pack(combined_sequence_number)[2:]
         )
     return _pack_nonce
 
 
+async def _pack_data(loop, executor, nonce, message, box=None, pack=True):
+    """
+    Return the serialised (and optionally encrypted) data of a message
+    including the nonce.
+    """
+    if pack:
+        data = await loop.run_in_executor(executor, _packb, message)
+    else:
+        data = message
+    if box is not None:
+        _, data = box.encrypt(data, nonce=nonce, pack_nonce=False)
+
+    # Note: The frame is handed to the WebSocket client as is, which avoids
+    #       copying it into an immutable bytes instance.
+    nonce_length = len(nonce)
+    frame = bytearray(nonce_length + len(data))
+    frame[:nonce_length] = nonce
+    frame[nonce_length:] = data
+    return frame
+
+
 @pytest.fixture(scope='module')
-def pack_message(request, event_loop):
+def pack_message(request, event_loop, msgpack_executor):
     async def _pack_message(client, nonce, message, box=None, timeout=None, pack=True):
-        if pack:
-            data = umsgpack.packb(message)
-        else:
-            data = message
-        if box is not None:
-            _, data = box.encrypt(data, nonce=nonce, pack_nonce=False)
-        data = b''.join((nonce, data))
+        data = await _pack_data(
+            event_loop, msgpack_executor, nonce, message, box=box, pack=pack)
         timeout = _get_timeout(timeout=timeout, request=request)
         await asyncio.wait_for(client.send(data), timeout, loop=event_loop)
         return data
     return _pack_message
 
 
+@pytest.fixture(scope='module')
+def pack_messages(request, event_loop, msgpack_executor):
+    """
+    Pack multiple messages upfront and send them back-to-back within a
+    single timeout.
+
+    Note: The SaltyRTC protocol requires one message per WebSocket
+          frame, so each message is still being sent as its own frame.
+    """
+    async def _pack_messages(client, items, box=None, timeout=None, pack=True):
+        data = [
+            await _pack_data(
+                event_loop, msgpack_executor, nonce, message, box=box, pack=pack)
+            for nonce, message in items
+        ]
+
+        async def _send_all():
+            for frame in data:
+                await client.send(frame)
+
+        timeout = _get_timeout(timeout=timeout, request=request)
+        await asyncio.wait_for(_send_all(), timeout, loop=event_loop)
+        return data
+    return _pack_messages
+
+
+def _strip_output(output):
+    """
+    Strip leading and trailing empty lines, traceback headers and
+    pydev debugger output from CLI output.
+    """
+    # Strip leading empty lines and pydev debugger output
+    rubbish = [
+        'pydev debugger: process',
+        'Traceback (most recent call last):',
+    ]
+    lines = []
+    skip_following_empty_lines = True
+    for line in output.splitlines(keepends=True):
+        if any((line.startswith(s) for s in rubbish)):
+            skip_following_empty_lines = True
+        elif not skip_following_empty_lines or len(line.strip()) > 0:
+            lines.append(line)
+            skip_following_empty_lines = False
+
+    # Strip trailing empty lines
+    empty_lines_count = 0
+    for line in reversed(lines):
+        if len(line.strip()) > 0:
+            break
+        empty_lines_count += 1
+    if empty_lines_count > 0:
+        lines = lines[:-empty_lines_count]
+    return ''.join(lines)
+
+
 @pytest.fixture(scope='module')
 def cli(request, event_loop):
-    async def _call_cli(*args, input=None, timeout=None, signal=None, env=None):
-        # Get timeout
+    async def _call_cli(
+            *args, input=None, timeout=None, signal=None, wait_for='Started', env=None
+    ):
+        # Get timeout (and include the startup of the subprocess)
         timeout = _get_timeout(timeout=timeout, request=request)
+        startup_timeout = timeout + pytest.saltyrtc.cli_startup_timeout
 
         # Prepare environment
         if env is None:
@@ -668,65 +942,45 @@ def cli(request, event_loop):
             stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
         process = await create
 
-        # Wait for process to terminate
-        task = event_loop.create_task(process.communicate(input=input))
-        maybe_shielded_task = task
-        if signal is not None:
-            maybe_shielded_task = asyncio.shield(maybe_shielded_task, loop=event_loop)
-        output = None
-        timeout_exc = False
-        try:
-            output, _ = await asyncio.wait_for(
-                maybe_shielded_task, timeout, loop=event_loop)
-        except asyncio.TimeoutError:
-            if signal is None:
-                raise
-            timeout_exc = True
-
-        # Send signal (if requested)
-        if timeout_exc and signal is not None:
+        if signal is None:
+            # Wait for process to terminate
+            try:
+                output, _ = await asyncio.wait_for(
+                    process.communicate(input=input), startup_timeout, loop=event_loop)
+            finally:
+                # Don't leave the process behind in case of a timeout
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            output = output.decode('utf-8')
+        else:
+            if input is not None:
+                process.stdin.write(input)
+            process.stdin.close()
+
+            # Stream output and send signal(s) as soon as the marker appears
+            serve_process = ServeProcess(process, timeout, event_loop)
             try:
-                signals = list(signal)
-            except TypeError:
-                signals = [signal]
-            length = len(signals)
-            for i, signal in enumerate(signals):
-                shielded_task = asyncio.shield(task, loop=event_loop)
-                process.send_signal(signal)
+                await serve_process.wait_for(wait_for, timeout=startup_timeout)
+            except EOFError:
+                # Process exited early, the return code will tell what happened
+                await serve_process.wait_closed()
+            else:
                 try:
-                    output, _ = await asyncio.wait_for(
-                        shielded_task, timeout, loop=event_loop)
-                except asyncio.TimeoutError:
-                    if i == (length - 1):
-                        task.cancel()
-                        raise
-
-        # Process output
-        output = output.decode('utf-8')
-
-        # Strip leading empty lines and pydev debugger output
-        rubbish = [
-            'pydev debugger: process',
-            'Traceback (most recent call last):',
-        ]
-        lines = []
-        skip_following_empty_lines = True
-        for line in output.splitlines(keepends=True):
-            if any((line.startswith(s) for s in rubbish)):
-                skip_following_empty_lines = True
-            elif not skip_following_empty_lines or len(line.strip()) > 0:
-                lines.append(line)
-                skip_following_empty_lines = False
-
-        # Strip trailing empty lines
-        empty_lines_count = 0
-        for line in reversed(lines):
-            if len(line.strip()) > 0:
-                break
-            empty_lines_count += 1
-        if empty_lines_count > 0:
-            lines = lines[:-empty_lines_count]
-        output = ''.join(lines)
+                    signals = list(signal)
+                except TypeError:
+                    signals = [signal]
+                for signal_ in signals:
+                    await serve_process.send_signal(signal_)
+                await serve_process.wait_closed()
+            finally:
+                # Don't leave the process behind in case of a timeout
+                if process.returncode is None:
+                    process.kill()
+                    await serve_process.wait_closed()
+            output = '\n'.join(serve_process.lines)
+
+        output = _strip_output(output)
 
         # Check return code
         if process.returncode != 0:
@@ -736,6 +990,164 @@ def cli(request, event_loop):
     return _call_cli
 
 
+class ServeProcess:
+    """
+    A server process started via the CLI whose output is being
+    collected line by line. It can be restarted (HUP signal) and
+    stopped (INT signal).
+    """
+    def __init__(self, process, timeout, loop) -> None:
+        self.process = process
+        self.timeout = timeout
+        self.lines = []
+        self._loop = loop
+        self._line_event = asyncio.Event(loop=loop)
+        self._reader = loop.create_task(self._read())
+        self._reader.add_done_callback(lambda _: self._line_event.set())
+
+    async def _read(self):
+        async for line in self.process.stdout:
+            self.lines.append(line.decode('utf-8').rstrip('\n'))
+            self._line_event.set()
+
+    async def wait_for(self, marker, start=0, timeout=None):
+        """
+        Wait until a line equal to *marker* has been written at or after
+        line index *start* and return the lines from *start* up to and
+        including that line. Defaults to the process' *timeout*.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        async def _wait_for():
+            index = start
+            while True:
+                for index in range(index, len(self.lines)):
+                    if self.lines[index] == marker:
+                        return self.lines[start:index + 1]
+                index = len(self.lines)
+                if self._reader.done():
+                    raise EOFError("Process exited before '{}' appeared:\n{}".format(
+                        marker, '\n'.join(self.lines)))
+                self._line_event.clear()
+                await self._line_event.wait()
+
+        return await asyncio.wait_for(_wait_for(), timeout, loop=self._loop)
+
+    async def send_signal(self, signal_):
+        """
+        Send a signal to the server and return the output produced
+        meanwhile. For a HUP signal, wait until the server has been
+        restarted. For any other signal, wait until the process exited.
+        """
+        start = len(self.lines)
+        self.process.send_signal(signal_)
+        if signal_ == signal.SIGHUP:
+            return await self.wait_for('Started', start=start)
+        await self.wait_closed()
+        return self.lines[start:]
+
+    async def wait_closed(self):
+        """
+        Wait until the process exited and all output has been read.
+        """
+        await asyncio.wait_for(
+            asyncio.gather(self._reader, self.process.wait(), loop=self._loop),
+            self.timeout, loop=self._loop)
+
+    def restart(self):
+        """
+        Restart the server and return the output produced meanwhile.
+        """
+        return self.send_signal(signal.SIGHUP)
+
+    def stop(self):
+        """
+        Stop the server and return the output produced meanwhile.
+        """
+        return self.send_signal(signal.SIGINT)
+
+
+@pytest.fixture(scope='module')
+def long_running_server(request, event_loop, primary_key_hex):
+    """
+    Return a :class:`ServeProcess` instance of a server that has been
+    started via the CLI once per module. Tests can inspect its output
+    and restart it instead of launching a new process each time. The
+    last test using it is expected to stop it. Otherwise, the process
+    will be killed on teardown.
+    """
+    parameters = [
+        sys.executable, pytest.saltyrtc.cli_path,
+        'serve',
+        '-tc', pytest.saltyrtc.cert,
+        '-tk', pytest.saltyrtc.key,
+        '-k', primary_key_hex,
+        '-p', str(unused_tcp_port()),
+    ]
+
+    # Start server
+    create = asyncio.create_subprocess_exec(
+        *parameters, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    process = event_loop.run_until_complete(create)
+    timeout = _get_timeout(request=request)
+    serve_process = ServeProcess(process, timeout, event_loop)
+
+    def fin():
+        if process.returncode is None:
+            process.kill()
+            event_loop.run_until_complete(serve_process.wait_closed())
+
+    request.addfinalizer(fin)
+
+    # Wait until the server is ready
+    startup_timeout = timeout + pytest.saltyrtc.cli_startup_timeout
+    event_loop.run_until_complete(
+        serve_process.wait_for('Started', timeout=startup_timeout))
+    return serve_process
+
+
+@pytest.fixture(scope='module')
+def cli_in_process():
+    """
+    Call the CLI in-process by using :class:`click.testing.CliRunner`.
+
+    Note: Only use this for commands that do not start the server or
+          enable logging since both affect the process' global state.
+          Starting the server raises an exception so that a regression
+          fails the test instead of blocking the test session.
+    """
+    runner = CliRunner()
+
+    def _serve(*_, **__):
+        raise RuntimeError('The server must not be started in-process')
+
+    def _call_cli(*args, input=None, env=None):
+        # Restore the asyncio debug flag afterwards (set by the CLI)
+        env_ = {'PYTHONASYNCIODEBUG': os.environ.get('PYTHONASYNCIODEBUG')}
+        if env is not None:
+            env_.update(env)
+
+        # Call CLI (same arguments as the `main` function uses)
+        with mock.patch('saltyrtc.server.server.serve', _serve):
+            result = runner.invoke(
+                cli_group, args=list(args), input=input, env=env_,
+                obj={'logging_handler': None}, auto_envvar_prefix='SALTYRTC_SERVER')
+
+        # Append the traceback of unhandled exceptions (like the interpreter would)
+        output = result.output
+        if result.exc_info is not None and not isinstance(result.exception, SystemExit):
+            output += ''.join(traceback.format_exception(*result.exc_info))
+        output = _strip_output(output)
+
+        # Check return code
+        if result.exit_code != 0:
+            parameters = [pytest.saltyrtc.cli_path] + list(args)
+            raise CalledProcessError(result.exit_code, parameters, output=output)
+        return output
+    return _call_cli
+
+
 @pytest.fixture(scope='function')
 def fake_logbook_env(tmpdir):
     tmpdir.join("logbook.py").write("raise ImportError('h3h3')")
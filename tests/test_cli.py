@@ -9,28 +9,25 @@ import pytest
 from saltyrtc.server import (
     Server,
     __version__ as _version,
-    util,
 )
 
 
 @pytest.mark.usefixtures('evaluate_log')
 class TestCLI:
-    @pytest.mark.asyncio
-    async def test_invalid_command(self, cli):
+    def test_invalid_command(self, cli_in_process):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli('meow')
+            cli_in_process('meow')
         assert 'No such command "meow"' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_invalid_verbosity(self, cli):
+    def test_invalid_verbosity(self, cli_in_process):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli('-v', '8')
+            cli_in_process('-v', '8')
         assert 'is not in the valid range' in exc_info.value.output
 
     @pytest.mark.asyncio
-    async def test_import_error_logbook(self, cli, fake_logbook_env):
+    async def test_import_error_logbook(self, cli, fake_logbook_env, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli('-v', '7', 'serve', '-p', '8443', env=fake_logbook_env)
+            await cli('-v', '7', 'serve', '-p', cli_port, env=fake_logbook_env)
         assert ('Please install saltyrtc.server[logging] for '
                 'logging support') in exc_info.value.output
 
@@ -40,25 +37,22 @@ class TestCLI:
         assert 'Version: {}'.format(_version) in output
         assert str(Server.subprotocols) in output
 
-    @pytest.mark.asyncio
-    async def test_generate_key_invalid_path(self, cli, tmpdir):
+    def test_generate_key_invalid_path(self, cli_in_process, tmpdir):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli('generate', str(tmpdir))
+            cli_in_process('generate', str(tmpdir))
         assert 'is a directory' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_generate_key_invalid_permissions(self, cli, tmpdir):
+    def test_generate_key_invalid_permissions(self, cli_in_process, tmpdir):
         keyfile = tmpdir.join('keyfile.key')
         keyfile.write('meow')
         keyfile.chmod(stat.S_IREAD)
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli('generate', str(keyfile))
+            cli_in_process('generate', str(keyfile))
         assert 'is not writable' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_generate_key(self, cli, tmpdir):
+    def test_generate_key(self, cli_in_process, tmpdir):
         keyfile = tmpdir.join('keyfile.key')
-        await cli('generate', str(keyfile))
+        cli_in_process('generate', str(keyfile))
 
         # Check length
         key = binascii.unhexlify(keyfile.read())
@@ -69,84 +63,80 @@ class TestCLI:
         permissions = stat_result.st_mode
         assert permissions & stat.S_IRWXU == stat.S_IRUSR | stat.S_IWUSR
 
-    @pytest.mark.asyncio
-    async def test_serve_key_missing(self, cli):
+    def test_serve_key_missing(self, cli_in_process, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-k', pytest.saltyrtc.permanent_key_primary,
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'It is REQUIRED' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_cert_missing(self, cli):
+    def test_serve_cert_missing(self, cli_in_process, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'It is REQUIRED' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_cert(self, cli, tmpdir):
+    def test_serve_invalid_cert(self, cli_in_process, tmpdir, cli_port):
         cert = tmpdir.join('cert.pem')
         cert.write('meowmeow')
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', str(cert),
                 '-k', pytest.saltyrtc.permanent_key_primary,
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'SSLError' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_key_file(self, cli, tmpdir):
+    def test_serve_invalid_key_file(self, cli_in_process, tmpdir, cli_port):
         keyfile = tmpdir.join('keyfile.key')
         keyfile.write('6d656f77')
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', str(keyfile),
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'ValueError' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_dh_params_file(self, cli, tmpdir):
+    def test_serve_invalid_dh_params_file(self, cli_in_process, tmpdir, cli_port):
         dh_params_file = tmpdir.join('dh_params.pem')
         dh_params_file.write('meowmeow')
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
                 '-dhp', str(dh_params_file),
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'SSLError' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_hex_encoded_key(self, cli):
-        key = open(pytest.saltyrtc.permanent_key_primary, 'r').read()[:63]
+    def test_serve_invalid_hex_encoded_key(
+            self, cli_in_process, primary_key_hex, cli_port
+    ):
+        key = primary_key_hex[:63]
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', key,
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'ValueError' in exc_info.value.output
 
     @pytest.mark.asyncio
-    async def test_serve_invalid_host(self, cli):
+    async def test_serve_invalid_host(self, cli, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
             await cli(
                 'serve',
@@ -154,15 +144,14 @@ class TestCLI:
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
                 '-h', 'meow',
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert any(('Name or service not known' in exc_info.value.output,
                     'No address associated with hostname' in exc_info.value.output))
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_port(self, cli):
+    def test_serve_invalid_port(self, cli_in_process):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
@@ -171,79 +160,65 @@ class TestCLI:
             )
         assert 'is not a valid integer' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_loop(self, cli):
+    def test_serve_invalid_loop(self, cli_in_process, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
-                '-p', '8443',
+                '-p', cli_port,
                 '-l', 'meow',
             )
         assert 'invalid choice' in exc_info.value.output
 
     @pytest.saltyrtc.no_uvloop
-    @pytest.mark.asyncio
-    async def test_serve_uvloop_unavailable(self, cli):
+    def test_serve_uvloop_unavailable(self, cli_in_process, cli_port):
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
-                '-p', '8443',
+                '-p', cli_port,
                 '-l', 'uvloop',
             )
         assert "Cannot use event loop 'uvloop'" in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_asyncio(self, cli):
-        output = await cli(
-            'serve',
-            '-tc', pytest.saltyrtc.cert,
-            '-tk', pytest.saltyrtc.key,
-            '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
-            signal=signal.SIGINT,
-        )
-        assert 'Stopped' in output
+    def test_serve_asyncio(self, long_running_server):
+        assert 'Started' in long_running_server.lines
+        assert long_running_server.process.returncode is None
 
     @pytest.mark.asyncio
-    async def test_serve_asyncio_dh_params(self, cli):
+    async def test_serve_asyncio_dh_params(self, cli, cli_port):
         output = await cli(
             'serve',
             '-tc', pytest.saltyrtc.cert,
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
             '-dhp', pytest.saltyrtc.dh_params,
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
         )
         assert 'Stopped' in output
 
-    @pytest.mark.asyncio
-    async def test_serve_asyncio_hex_encoded_key(self, cli):
-        output = await cli(
-            'serve',
-            '-tc', pytest.saltyrtc.cert,
-            '-tk', pytest.saltyrtc.key,
-            '-k', open(pytest.saltyrtc.permanent_key_primary, 'r').read(),
-            '-p', '8443',
-            signal=signal.SIGINT,
-        )
-        assert 'Stopped' in output
+    def test_serve_asyncio_hex_encoded_key(
+            self, long_running_server, server_permanent_keys
+    ):
+        # Note: The shared server has been started with the hex-encoded primary key
+        public_key = server_permanent_keys[0].hex_pk().decode('ascii')
+        line = 'Primary public permanent key: {}'.format(public_key)
+        assert line in long_running_server.lines
 
     @pytest.mark.asyncio
-    async def test_serve_asyncio_plus_logging(self, cli):
+    async def test_serve_asyncio_plus_logging(self, cli, cli_port):
         output = await cli(
             '-v', '7',
             'serve',
             '-tc', pytest.saltyrtc.cert,
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
         )
         assert 'Server instance' in output
@@ -251,13 +226,13 @@ class TestCLI:
 
     @pytest.saltyrtc.have_uvloop
     @pytest.mark.asyncio
-    async def test_serve_uvloop(self, cli):
+    async def test_serve_uvloop(self, cli, cli_port):
         output = await cli(
             'serve',
             '-tc', pytest.saltyrtc.cert,
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
+            '-p', cli_port,
             '-l', 'uvloop',
             signal=signal.SIGINT,
         )
@@ -265,14 +240,14 @@ class TestCLI:
 
     @pytest.saltyrtc.have_uvloop
     @pytest.mark.asyncio
-    async def test_serve_uvloop_dh_params(self, cli):
+    async def test_serve_uvloop_dh_params(self, cli, cli_port):
         output = await cli(
             'serve',
             '-tc', pytest.saltyrtc.cert,
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
             '-dhp', pytest.saltyrtc.dh_params,
-            '-p', '8443',
+            '-p', cli_port,
             '-l', 'uvloop',
             signal=signal.SIGINT,
         )
@@ -280,14 +255,14 @@ class TestCLI:
 
     @pytest.saltyrtc.have_uvloop
     @pytest.mark.asyncio
-    async def test_serve_uvloop_plus_logging(self, cli):
+    async def test_serve_uvloop_plus_logging(self, cli, cli_port):
         output = await cli(
             '-v', '7',
             'serve',
             '-tc', pytest.saltyrtc.cert,
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
+            '-p', cli_port,
             '-l', 'uvloop',
             signal=signal.SIGINT,
         )
@@ -295,50 +270,47 @@ class TestCLI:
         assert 'Closing protocols' in output
 
     @pytest.mark.asyncio
-    async def test_serve_asyncio_restart(self, cli):
-        output = await cli(
-            'serve',
-            '-tc', pytest.saltyrtc.cert,
-            '-tk', pytest.saltyrtc.key,
-            '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
-            signal=[signal.SIGHUP, signal.SIGINT],
-        )
-        output = output.split('\n')
-        assert output.count('Started') == 2
-        assert output.count('Stopped') == 2
+    async def test_serve_asyncio_restart(self, long_running_server):
+        # Restart twice (HUP signal)
+        for _ in range(2):
+            output = await long_running_server.restart()
+            assert output.count('Stopped') == 1
+            assert output.count('Started') == 1
 
-    @pytest.mark.asyncio
-    async def test_serve_safety_not_quite_off(self, cli):
+        # Stop (INT signal)
+        # Note: This must be the last test that uses the shared server
+        output = await long_running_server.stop()
+        assert 'Stopped' in output
+        assert long_running_server.process.returncode == 0
+
+    def test_serve_safety_not_quite_off(self, cli_in_process):
         env = os.environ.copy()
         env['SALTYRTC_SAFETY_OFF'] = 'Eh... yeah'
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 env=env,
              )
         assert 'It is REQUIRED' in exc_info.value.output
 
     @pytest.mark.asyncio
-    async def test_serve_safety_off(self, cli):
+    async def test_serve_safety_off(self, cli, cli_port):
         env = os.environ.copy()
         env['SALTYRTC_SAFETY_OFF'] = 'yes-and-i-know-what-im-doing'
         output = await cli(
             'serve',
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
             env=env,
         )
         assert 'Stopped' in output
 
-    @pytest.mark.asyncio
-    async def test_serve_repeated_key(self, cli):
-        primary_key = open(pytest.saltyrtc.permanent_key_primary, 'r').read()
+    def test_serve_repeated_key(self, cli_in_process, primary_key_hex, cli_port):
         combinations = [
             ['-k', pytest.saltyrtc.permanent_key_primary,
              '-k', pytest.saltyrtc.permanent_key_primary],
             ['-k', pytest.saltyrtc.permanent_key_primary,
-             '-k', primary_key],
+             '-k', primary_key_hex],
             ['-k', pytest.saltyrtc.permanent_key_secondary,
              '-k', pytest.saltyrtc.permanent_key_secondary],
         ]
@@ -346,50 +318,48 @@ class TestCLI:
         # Try all combinations
         for key_arguments in combinations:
             with pytest.raises(subprocess.CalledProcessError) as exc_info:
-                await cli(*[
+                cli_in_process(*[
                     'serve',
                     '-tc', pytest.saltyrtc.cert,
                     '-tk', pytest.saltyrtc.key,
-                    '-p', '8443',
+                    '-p', cli_port,
                 ] + key_arguments)
             assert 'key has been supplied more than once' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_2nd_key_file(self, cli, tmpdir):
+    def test_serve_invalid_2nd_key_file(self, cli_in_process, tmpdir, cli_port):
         keyfile = tmpdir.join('keyfile.key')
         keyfile.write('6d656f77')
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
                 '-k', str(keyfile),
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'ValueError' in exc_info.value.output
 
-    @pytest.mark.asyncio
-    async def test_serve_invalid_2nd_hex_encoded_key(self, cli):
-        key = open(pytest.saltyrtc.permanent_key_primary, 'r').read()[:63]
+    def test_serve_invalid_2nd_hex_encoded_key(
+            self, cli_in_process, primary_key_hex, cli_port
+    ):
+        key = primary_key_hex[:63]
         with pytest.raises(subprocess.CalledProcessError) as exc_info:
-            await cli(
+            cli_in_process(
                 'serve',
                 '-tc', pytest.saltyrtc.cert,
                 '-tk', pytest.saltyrtc.key,
                 '-k', pytest.saltyrtc.permanent_key_primary,
                 '-k', key,
-                '-p', '8443',
+                '-p', cli_port,
             )
         assert 'ValueError' in exc_info.value.output
 
     @pytest.mark.asyncio
-    async def test_serve_asyncio_2nd_key(self, cli):
+    async def test_serve_asyncio_2nd_key(self, cli, server_permanent_keys, cli_port):
         # Load keys
-        primary_key = util.load_permanent_key(pytest.saltyrtc.permanent_key_primary)
-        primary_key = primary_key.hex_pk().decode('ascii')
-        secondary_key = util.load_permanent_key(pytest.saltyrtc.permanent_key_secondary)
-        secondary_key = secondary_key.hex_pk().decode('ascii')
+        primary_key, secondary_key = [
+            key.hex_pk().decode('ascii') for key in server_permanent_keys]
 
         # Check output
         output = await cli(
@@ -398,7 +368,7 @@ class TestCLI:
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
             '-k', pytest.saltyrtc.permanent_key_secondary,
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
         )
         assert 'Primary public permanent key: {}'.format(primary_key) in output
@@ -406,12 +376,12 @@ class TestCLI:
         assert 'Stopped' in output
 
     @pytest.mark.asyncio
-    async def test_serve_asyncio_2nd_key_reversed(self, cli):
+    async def test_serve_asyncio_2nd_key_reversed(
+            self, cli, server_permanent_keys, cli_port
+    ):
         # Load keys
-        primary_key = util.load_permanent_key(pytest.saltyrtc.permanent_key_primary)
-        primary_key = primary_key.hex_pk().decode('ascii')
-        secondary_key = util.load_permanent_key(pytest.saltyrtc.permanent_key_secondary)
-        secondary_key = secondary_key.hex_pk().decode('ascii')
+        primary_key, secondary_key = [
+            key.hex_pk().decode('ascii') for key in server_permanent_keys]
 
         # Check output
         output = await cli(
@@ -420,7 +390,7 @@ class TestCLI:
             '-tk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_secondary,
             '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
         )
         assert 'Primary public permanent key: {}'.format(secondary_key) in output
@@ -428,13 +398,13 @@ class TestCLI:
         assert 'Stopped' in output
 
     @pytest.mark.asyncio
-    async def test_serve_deprecated_options(self, cli):
+    async def test_serve_deprecated_options(self, cli, cli_port):
         output = await cli(
             'serve',
             '-sc', pytest.saltyrtc.cert,
             '-sk', pytest.saltyrtc.key,
             '-k', pytest.saltyrtc.permanent_key_primary,
-            '-p', '8443',
+            '-p', cli_port,
             signal=signal.SIGINT,
         )
         assert 'DeprecationWarning' in output
@@ -630,7 +630,11 @@ class TestProtocol:
         """
         # Create client and patch it to not answer pings
         ws_client = await ws_client_factory()
-        ws_client.pong = asyncio.coroutine(lambda *args, **kwargs: None)
+
+        async def _mock_pong(*args, **kwargs):
+            pass
+
+        ws_client.pong = _mock_pong
 
         # Patch server's keep alive interval and timeout
         assert len(server.protocols) == 1
@@ -1242,17 +1246,19 @@ class TestProtocol:
 
         # Send 3 relay messages: initiator --> responder
         expected_data = b'\xfe' * 2**16  # 64 KiB
+        items = []
         for _ in range(3):
             nonce = pack_nonce(i['rcck'], i['id'], r['id'], i['rccsn'])
-            await initiator.send(nonce, expected_data, box=None)
+            items.append((nonce, expected_data))
             i['rccsn'] += 1
+        await initiator.send_batch(items, box=None)
 
         # Close initiator
         await initiator.close()
 
         # Receive 3 relay messages: initiator --> responder
-        for _ in range(3):
-            actual_data, *_ = await responder.recv(box=None)
+        messages = await responder.recv_batch(3, box=None)
+        for actual_data, *_ in messages:
             assert actual_data == expected_data
 
         # Bye
@@ -1284,10 +1290,12 @@ class TestProtocol:
 
         # Send 6 relay messages: initiator --> responder
         expected_data = b'\xfe' * 2**15  # 32 KiB
+        items = []
         for _ in range(6):
             nonce = pack_nonce(i['rcck'], i['id'], r['id'], i['rccsn'])
-            await initiator.send(nonce, expected_data, box=None)
+            items.append((nonce, expected_data))
             i['rccsn'] += 1
+        await initiator.send_batch(items, box=None)
 
         # Drop responder
         await initiator.send(pack_nonce(i['cck'], 0x01, 0x00, i['ccsn']), {
@@ -1297,8 +1305,8 @@ class TestProtocol:
         i['ccsn'] += 1
 
         # Receive 6 relay messages: initiator --> responder
-        for _ in range(6):
-            actual_data, *_ = await responder.recv(box=None)
+        messages = await responder.recv_batch(6, box=None)
+        for actual_data, *_ in messages:
             assert actual_data == expected_data
 
         # Responder: Expect drop by initiator
@@ -1335,10 +1343,12 @@ class TestProtocol:
 
         # Send 6 relay messages: initiator <-- responder
         expected_data = b'\xfe' * 2**15  # 32 KiB
+        items = []
         for _ in range(6):
             nonce = pack_nonce(r['icck'], r['id'], i['id'], r['iccsn'])
-            await responder.send(nonce, expected_data, box=None)
+            items.append((nonce, expected_data))
             r['iccsn'] += 1
+        await responder.send_batch(items, box=None)
 
         # Second initiator handshake
         second_initiator, i = await client_factory(initiator_handshake=True)
@@ -1349,8 +1359,8 @@ class TestProtocol:
         await responder.recv()
 
         # Receive 6 relay messages: initiator <-- responder
-        for _ in range(6):
-            actual_data, *_ = await first_initiator.recv(box=None)
+        messages = await first_initiator.recv_batch(6, box=None)
+        for actual_data, *_ in messages:
             assert actual_data == expected_data
 
         # First initiator: Expect drop by initiator
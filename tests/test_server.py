@@ -274,7 +274,11 @@ class TestServer:
 
         # Create client and patch it to not answer pings
         ws_client = await ws_client_factory()
-        ws_client.pong = asyncio.coroutine(lambda *args, **kwargs: None)
+
+        async def _mock_pong(*args, **kwargs):
+            pass
+
+        ws_client.pong = _mock_pong
 
         # Patch server's keep alive interval and timeout
         assert len(server.protocols) == 1